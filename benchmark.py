@@ -0,0 +1,287 @@
+# Basics
+import argparse
+import json
+import os
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# Pipeline
+from nlp_utils import merge_aliases_in_article, process_person_entities, genderization
+from network_utils import create_co_mention_graph, louvain_based_communities_randomized, network_summary
+
+# Global variables
+results_dir = "benchmark_results"
+
+# Corpus sizes, the number of persons sets how big the co-mention graph gets
+SCALES = {
+    "small":  {"n_articles": 500,  "n_persons": 200},
+    "medium": {"n_articles": 2000, "n_persons": 600},
+    "large":  {"n_articles": 8000, "n_persons": 1500},
+}
+
+MALE_FIRST_NAMES = [
+    "Anders", "Bo", "Christian", "Frederik", "Henrik", "Jens", "Jesper", "Kasper", "Lars", "Mads",
+    "Mikkel", "Morten", "Niels", "Peter", "Rasmus", "Søren", "Thomas", "Mathias", "Jonas", "Joachim",
+]
+FEMALE_FIRST_NAMES = [
+    "Anne", "Camilla", "Ditte", "Emma", "Ida", "Julie", "Karina", "Line", "Louise", "Maria",
+    "Mette", "Nanna", "Pernille", "Sofie", "Signe", "Trine", "Helle", "Birgitte", "Mary", "Malene",
+]
+SURNAMES = [
+    "Jensen", "Nielsen", "Hansen", "Pedersen", "Andersen", "Christensen", "Larsen", "Sørensen",
+    "Rasmussen", "Jørgensen", "Petersen", "Madsen", "Kristensen", "Olsen", "Thomsen", "Poulsen",
+    "Johansen", "Møller", "Mortensen", "Frederiksen", "Kjær", "Lund", "Holm", "Schou", "Bendtsen",
+]
+DESCRIPTION_WORDS = [
+    "kendt", "dansk", "tidligere", "skuespiller", "sanger", "vært", "deltager", "populær", "ny",
+    "kongelig", "prinsesse", "prins", "vinder", "stjerne", "realitystjerne", "influencer", "glad",
+]
+
+
+
+########## Synthetic data ##########
+
+def make_persons(n_persons, rng):
+    r"""Generates unique Danish-style persons with aliases.
+
+    :param n_persons: Number of persons.
+    :param rng: NumPy random generator.
+    :return: List of persons as dicts with name, aliases and gender
+    """
+
+    persons = []
+    seen = set()
+
+    while len(persons) < n_persons:
+        gender = "male" if rng.random() < 0.5 else "female"
+        first = rng.choice(MALE_FIRST_NAMES if gender == "male" else FEMALE_FIRST_NAMES)
+        surname = rng.choice(SURNAMES)
+
+        # Some persons get a middle name, which also keeps names unique at larger scales
+        middle = rng.choice(SURNAMES) if rng.random() < 0.4 else None
+        name = f"{first} {middle} {surname}" if middle else f"{first} {surname}"
+        if name in seen:
+            continue
+        seen.add(name)
+
+        aliases = [name, f"{first} {surname}", surname] if middle else [name, surname]
+        persons.append({"name": name, "aliases": aliases, "gender": gender})
+
+    return persons
+
+def make_corpus(n_articles, n_persons, seed=0, zipf_exponent=1.1, n_groups=None):
+    r"""Generates a synthetic corpus shaped like the output of nlp.py.
+
+    Person popularity is Zipf distributed and persons belong to groups (e.g. a show or
+    a family) that tend to be mentioned together, so the co-mention graph has communities.
+
+    :param n_articles: Number of articles.
+    :param n_persons: Number of distinct persons.
+    :param seed: Seed, the same seed always gives the same corpus.
+    :param zipf_exponent: Exponent of the Zipf distribution over persons.
+    :param n_groups: Number of person groups (defaults to n_persons // 15).
+    :return: DataFrame with 'article_id', 'persons', 'person_descriptions' and 'coref_clusters'
+    """
+
+    rng = np.random.default_rng(seed)
+    persons = make_persons(n_persons, rng)
+
+    # Zipf popularity and group membership
+    popularity = 1 / np.arange(1, n_persons + 1) ** zipf_exponent
+    rng.shuffle(popularity)
+    n_groups = n_groups or max(1, n_persons // 15)
+    groups = rng.integers(0, n_groups, size=n_persons)
+    group_members = [np.flatnonzero(groups == g) for g in range(n_groups)]
+    group_popularity = np.array([popularity[m].sum() for m in group_members])
+    group_popularity /= group_popularity.sum()
+
+    rows = []
+    for article_id in range(n_articles):
+        # Most mentions come from one group, the rest from the whole population
+        group = group_members[rng.choice(n_groups, p=group_popularity)]
+        n_mentions = 1 + rng.poisson(3)
+        n_in_group = min(len(group), rng.binomial(n_mentions, 0.8))
+
+        p_group = popularity[group] / popularity[group].sum()
+        chosen = set(rng.choice(group, size=n_in_group, replace=False, p=p_group).tolist()) if n_in_group else set()
+        while len(chosen) < n_mentions:
+            chosen.add(int(rng.choice(n_persons, p=popularity / popularity.sum())))
+
+        mentions = []
+        descriptions = {}
+        coref_clusters = {}
+        for i, idx in enumerate(sorted(chosen)):
+            person = persons[idx]
+
+            # An article mentions the full name and sometimes a shorter alias too
+            names = [person["name"]]
+            if rng.random() < 0.5:
+                names.append(rng.choice(person["aliases"][1:]))
+            mentions.extend(names)
+
+            if rng.random() < 0.6:
+                descriptions[names[0]] = rng.choice(DESCRIPTION_WORDS, size=rng.integers(1, 4)).tolist()
+
+            pronouns = ["han", "ham", "hans"] if person["gender"] == "male" else ["hun", "hende", "hendes"]
+            coref_clusters[f"coref_clusters_{i + 1}"] = names + rng.choice(pronouns, size=rng.integers(1, 4)).tolist()
+
+        rows.append({
+            "article_id": article_id,
+            "persons": mentions,
+            "person_descriptions": descriptions,
+            "coref_clusters": coref_clusters,
+        })
+
+    return pd.DataFrame(rows)
+
+
+
+########## Measuring ##########
+
+def measure(func, repeat=3):
+    r"""Measures wall time and peak memory of a function call.
+
+    Timing uses the best of `repeat` runs without tracing, peak memory is taken from
+    one extra run under tracemalloc (Python allocations only).
+
+    :param func: Function without arguments.
+    :param repeat: Number of timed runs.
+    :return: Result of the function, wall time in seconds, peak memory in MB
+    """
+
+    wall_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        wall_times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, min(wall_times), peak / 1024**2
+
+def run_pipeline(df, repeat=3):
+    r"""Runs every pipeline stage on a corpus and measures it.
+
+    :param df: Corpus from make_corpus.
+    :param repeat: Number of timed runs per stage.
+    :return: List of per-stage metrics
+    """
+
+    stages = []
+
+    def record(stage, func, n_items, unit):
+        result, wall_time, peak_mb = measure(func, repeat=repeat)
+        throughput = n_items / wall_time if wall_time > 0 else float("nan")
+        stages.append({
+            "stage": stage,
+            "wall_time_s": round(wall_time, 4),
+            "peak_memory_mb": round(peak_mb, 2),
+            "items": n_items,
+            "throughput": round(throughput, 2),
+            "unit": f"{unit}/s",
+        })
+        print(f"  {stage:<40} {wall_time:9.3f} s {peak_mb:9.1f} MB {throughput:12.1f} {unit}/s")
+        return result
+
+    record("merge_aliases_in_article", lambda: [merge_aliases_in_article(p, threshold=85) for p in df["persons"]], len(df), "articles")
+    result_df = record("process_person_entities", lambda: process_person_entities(df), len(df), "articles")
+
+    # genderization adds a column in place, so it gets its own copy every run
+    result_df = record("genderization", lambda: genderization(result_df.copy()), len(result_df), "persons")
+
+    G = record("create_co_mention_graph", lambda: create_co_mention_graph(result_df), len(result_df) * (len(result_df) - 1) // 2, "pairs")
+
+    # Synthetic co-mention weights are lower than in the real corpus, hence the lower weight threshold
+    record("louvain_based_communities_randomized", lambda: louvain_based_communities_randomized(G, weight_threshold=3, seed=0), G.number_of_nodes(), "nodes")
+    record("network_summary", lambda: network_summary(G), G.number_of_nodes(), "nodes")
+
+    return stages
+
+
+
+########## Results ##########
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def save_results(results, path=None):
+    r"""Saves benchmark results as JSON, by default as benchmark_results/<commit>.json.
+
+    :param results: Results from main.
+    :param path: Output path.
+    :return: Path written to
+    """
+
+    if path is None:
+        os.makedirs(results_dir, exist_ok=True)
+        path = os.path.join(results_dir, f"{results['commit']}.json")
+
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+    return path
+
+def compare_results(results, baseline_path):
+    r"""Compares results against an earlier run, e.g. from another commit.
+
+    :param results: Results from main.
+    :param baseline_path: Path of earlier results JSON.
+    :return: DataFrame with wall time and peak memory ratios (new / baseline) per scale and stage
+    """
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def to_df(res):
+        return pd.DataFrame([
+            {"scale": scale, **stage}
+            for scale, stages in res["scales"].items()
+            for stage in stages
+        ]).set_index(["scale", "stage"])
+
+    new, old = to_df(results), to_df(baseline)
+    joined = new.join(old, how="inner", lsuffix="_new", rsuffix="_baseline")
+
+    return pd.DataFrame({
+        "wall_time_ratio": (joined["wall_time_s_new"] / joined["wall_time_s_baseline"]).round(3),
+        "peak_memory_ratio": (joined["peak_memory_mb_new"] / joined["peak_memory_mb_baseline"]).round(3),
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the entity -> graph -> community pipeline on synthetic data.")
+    parser.add_argument("--scales", nargs="+", default=["small", "medium"], choices=list(SCALES))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Results JSON (default: benchmark_results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": args.seed,
+        "scales": {},
+    }
+
+    for scale in args.scales:
+        print(f"Scale '{scale}': {SCALES[scale]}")
+        df = make_corpus(**SCALES[scale], seed=args.seed)
+        results["scales"][scale] = run_pipeline(df, repeat=args.repeat)
+
+    path = save_results(results, args.output)
+    print(f"Saved results to {path}")
+
+    if args.compare:
+        print(compare_results(results, args.compare))
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,9 @@ from imdb_utils import *
 # Genderize
 from utils import classify_gender
 
+# Instrumentation
+import profiling
+
 # Global variables
 reality_stars_dataset_path = "dataset/reality_stars.parquet"
 
@@ -40,6 +43,7 @@ def get_reality_titles():
 
     return df_titles
 
+@profiling.profiled()
 def get_reality_stars(max_workers=10):
     if os.path.isfile(reality_stars_dataset_path):
         return print("Reality stars dataset already exists.")
@@ -54,11 +58,12 @@ def get_reality_stars(max_workers=10):
     # e.g. with max_workers=10, one fetches 10 pages at a time
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = {executor.submit(get_cast, title): title for title in df_titles["id"]}
-        for future in as_completed(futures):
+        for done, future in enumerate(as_completed(futures), start=1):
             try:
                 all_cast.extend(future.result())
             except Exception as e:
                 print(f"Error fetching cast for {futures[future]}: {e}")
+            profiling.progress("fetch_cast", done, len(futures))
     
     # Collect reality stars in a DataFrame
     df_cast = pd.DataFrame(all_cast)
@@ -79,6 +84,7 @@ def get_reality_stars(max_workers=10):
 
     return df_people
 
+@profiling.profiled()
 def genderize_reality_stars():
     # Get dataset
     if not os.path.isfile(reality_stars_dataset_path):
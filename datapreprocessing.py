@@ -1,9 +1,11 @@
 import pandas as pd
 import os.path
+import profiling
 # Load the Parquet file
 
 
 
+@profiling.profiled()
 def loadData():
 
     """
@@ -16,6 +18,7 @@ def loadData():
       
     print("Loaded dataset succesfully:")
     rawDataFrame = pd.read_parquet('dataset/articles.parquet')
+    profiling.count("rows", len(rawDataFrame))
     return rawDataFrame
 
 
@@ -8,6 +8,9 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
 from bs4 import BeautifulSoup
 
+# Instrumentation
+import profiling
+
 
 
 # Global session
@@ -25,8 +28,12 @@ def get_soup(url):
     :return: Soup
     """
     
-    response = session.get(url)
-    return BeautifulSoup(response.content, "html.parser")
+    with profiling.timer("http_get"):
+        response = session.get(url)
+    with profiling.timer("parse_html"):
+        soup = BeautifulSoup(response.content, "html.parser")
+    profiling.count("pages")
+    return soup
 
 def get_titles(soup):
     r"""Retrieves the IMDb title IDs from IMDb's Advanced Title Search page (https://www.imdb.com/search/title/).
@@ -5,9 +5,15 @@ import pandas as pd
 import random
 from networkx import edge_boundary
 import community as community_louvain  # Louvain method
+import profiling
+from concurrent.futures import ProcessPoolExecutor
+import os
+import struct
+import zipfile
 
 
 
+@profiling.profiled()
 def create_co_mention_graph(names_df: pd.DataFrame, min_weight: int = 2):
     """
     Creates a co-mention graph from person entities in articles.
@@ -29,6 +35,7 @@ def create_co_mention_graph(names_df: pd.DataFrame, min_weight: int = 2):
     for _, row in names_df.iterrows():
         G.add_node(row["canonical_name"])
 
+    profiling.count("pairs_scored", len(names_df) * (len(names_df) - 1) // 2)
     for (_, row1), (_, row2) in combinations(names_df.iterrows(), 2):
         shared_articles = set(row1["article_ids"]) & set(row2["article_ids"])
         weight = len(shared_articles)
@@ -52,9 +59,12 @@ def create_co_mention_graph(names_df: pd.DataFrame, min_weight: int = 2):
     
     return H
 
+@profiling.profiled()
 def network_summary(graph: nx.Graph):
     """Generate detailed network statistics with visual formatting"""
     
+    profiling.count("nodes", len(graph))
+
     # Basic stats
     stats = {
         "Nodes": len(graph.nodes()),
@@ -89,6 +99,7 @@ def network_summary(graph: nx.Graph):
 
 
 import numpy as np
+@profiling.profiled()
 def louvain_based_communities_randomized(
     G,
     runs=10,
@@ -135,6 +146,9 @@ def louvain_based_communities_randomized(
             best_score = score
             best_partition = communities
 
+        profiling.count("runs")
+        profiling.progress("louvain_runs", run_idx + 1, runs)
+
     processed = []
     assigned = set()
 
@@ -169,3 +183,538 @@ def louvain_based_communities_randomized(
             break
 
     return sorted(processed, key=lambda x: (-x['internal_edges'] / x['size'], -x['size']))
+
+
+
+
+class CoMentionGraphStore:
+    """
+    Incrementally maintained co-mention graph.
+
+    Keeps the same graph as create_co_mention_graph (edges with weight > min_weight,
+    then nodes with only one neighbour and isolates removed) up to date as new
+    articles arrive, touching only the person pairs mentioned in those articles.
+
+    Attributes:
+        graph: The pruned NetworkX Graph
+        weights: Co-mention counts for every person pair seen so far
+        person_articles: Article IDs per canonical name
+    """
+
+    def __init__(self, min_weight: int = 2):
+        self.min_weight = min_weight
+        self.graph = nx.Graph()
+        self.weights: Dict[tuple, int] = {}
+        self.person_articles: Dict[str, Set] = {}
+        self._filtered = nx.Graph() # edges above min_weight, before degree pruning
+
+    @classmethod
+    def from_names_df(cls, names_df: pd.DataFrame, min_weight: int = 2):
+        """
+        Builds a store from the output of process_person_entities.
+
+        Args:
+            names_df: DataFrame containing 'canonical_name' and 'article_ids' columns
+            min_weight: Edges need more than this many shared articles
+
+        Returns:
+            A CoMentionGraphStore holding the same graph as create_co_mention_graph
+        """
+
+        article_persons = {}
+        for name, article_ids in zip(names_df["canonical_name"], names_df["article_ids"]):
+            for article_id in article_ids:
+                article_persons.setdefault(article_id, []).append(name)
+
+        store = cls(min_weight=min_weight)
+        store.add_articles(article_persons.items())
+        return store
+
+    def add_articles(self, rows):
+        """
+        Adds a batch of articles and updates the graph locally.
+
+        Args:
+            rows: Iterable of (article_id, canonical persons) pairs, e.g.
+                zip(df['article_id'], df['persons']). Articles already in the store are skipped.
+
+        Returns:
+            Dict of changes to the pruned graph, which can be used to warm-start community
+            detection (e.g. as the partition argument of community_louvain.best_partition):
+            - 'added_nodes': nodes that entered the graph
+            - 'added_edges': edges that entered the graph
+            - 'updated_edges': edges already in the graph whose weight changed
+        """
+
+        # Step 1: Count co-mentions for the new articles only
+        touched_pairs = set()
+        for article_id, persons in rows:
+            persons = sorted(set(persons))
+            new_persons = [p for p in persons if article_id not in self.person_articles.get(p, ())]
+            if not new_persons:
+                continue
+
+            for person in new_persons:
+                self.person_articles.setdefault(person, set()).add(article_id)
+
+            # Only pairs involving a person new to this article gain a co-mention
+            new_persons = set(new_persons)
+            for pair in combinations(persons, 2):
+                if pair[0] in new_persons or pair[1] in new_persons:
+                    self.weights[pair] = self.weights.get(pair, 0) + 1
+                    touched_pairs.add(pair)
+
+        # Step 2: Edges crossing the weight threshold enter the filtered graph
+        new_filtered_edges = []
+        for u, v in touched_pairs:
+            weight = self.weights[(u, v)]
+            if weight <= self.min_weight:
+                continue
+            if self._filtered.has_edge(u, v):
+                self._filtered[u][v]["weight"] = weight
+            else:
+                self._filtered.add_edge(u, v, weight=weight)
+                new_filtered_edges.append((u, v))
+
+        # Step 3: Re-apply the degree pruning around nodes whose degree changed.
+        # Weights only grow, so nodes and edges only ever enter the pruned graph.
+        changes = {"added_nodes": set(), "added_edges": set(), "updated_edges": set()}
+        degree_changed = {n for edge in new_filtered_edges for n in edge}
+
+        def add_edge(u, v):
+            for n in (u, v):
+                if n not in self.graph:
+                    changes["added_nodes"].add(n)
+            self.graph.add_edge(u, v, weight=self._filtered[u][v]["weight"])
+            changes["added_edges"].add((u, v) if u < v else (v, u))
+
+        for n in degree_changed:
+            if self._filtered.degree(n) < 2:
+                continue
+            for nbr in self._filtered.neighbors(n):
+                if self._filtered.degree(nbr) >= 2 and not self.graph.has_edge(n, nbr):
+                    add_edge(n, nbr)
+
+        for u, v in touched_pairs:
+            if self.graph.has_edge(u, v) and (u, v) not in changes["added_edges"]:
+                weight = self.weights[(u, v)]
+                if self.graph[u][v]["weight"] != weight:
+                    self.graph[u][v]["weight"] = weight
+                    changes["updated_edges"].add((u, v))
+
+        return changes
+
+
+
+########## Null models ##########
+
+def graph_to_csr(G, weight='weight'):
+    """
+    Converts a graph into CSR (compressed sparse row) arrays.
+
+    Args:
+        G: NetworkX Graph, e.g. from create_co_mention_graph
+        weight: Edge attribute used as weight (missing weights count as 1)
+
+    Returns:
+        nodes: List of node names, position i is node id i
+        indptr: int64 array of length n+1, neighbours of i are indices[indptr[i]:indptr[i+1]]
+        indices: int64 array of neighbour ids (sorted within each row)
+        weights: float64 array of edge weights aligned with indices
+    """
+
+    nodes = list(G.nodes())
+    node_idx = {node: i for i, node in enumerate(nodes)}
+
+    u = np.fromiter((node_idx[a] for a, b in G.edges()), dtype=np.int64, count=G.number_of_edges())
+    v = np.fromiter((node_idx[b] for a, b in G.edges()), dtype=np.int64, count=G.number_of_edges())
+    w = np.fromiter((d.get(weight, 1) for _, _, d in G.edges(data=True)), dtype=np.float64, count=G.number_of_edges())
+
+    indptr, indices, weights = _edges_to_csr(len(nodes), u, v, w)
+    return nodes, indptr, indices, weights
+
+def _edges_to_csr(n, u, v, w):
+    # Store each undirected edge in both directions, sorted by (row, column)
+    src = np.concatenate([u, v])
+    dst = np.concatenate([v, u])
+    wts = np.concatenate([w, w])
+
+    order = np.lexsort((dst, src))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+
+    return indptr, dst[order], wts[order]
+
+def _csr_to_edges(indptr, indices, weights):
+    # Recover every undirected edge once (u < v)
+    src = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    mask = src < indices
+    return src[mask], indices[mask], weights[mask]
+
+def _double_edge_swap(n, u, v, w, rounds, rng):
+    """Degree-preserving randomisation of an edge list via batched double-edge swaps.
+
+    Every round pairs up all edges at random and proposes one swap per pair,
+    (a, b), (c, d) -> (a, d), (c, b). Swaps that would create a self-loop,
+    an existing edge or a duplicate within the round are rejected, so the graph
+    stays simple. Edge weights travel with the edge that keeps its first endpoint.
+    """
+
+    u, v, w = u.copy(), v.copy(), w.copy()
+    m = len(u)
+    if m < 2:
+        return u, v, w
+
+    for _ in range(rounds):
+        # Random orientation so both swap variants are proposed
+        flip = rng.random(m) < 0.5
+        u[flip], v[flip] = v[flip], u[flip]
+
+        perm = rng.permutation(m)
+        half = m // 2
+        e1, e2 = perm[:half], perm[half:2 * half]
+
+        a, b, c, d = u[e1], v[e1], u[e2], v[e2]
+
+        # Current edge set as sorted keys (min, max)
+        keys = np.sort(np.minimum(u, v) * n + np.maximum(u, v))
+        new1 = np.minimum(a, d) * n + np.maximum(a, d)
+        new2 = np.minimum(c, b) * n + np.maximum(c, b)
+
+        ok = (a != d) & (c != b) & (new1 != new2)
+        ok &= ~_isin_sorted(new1, keys) & ~_isin_sorted(new2, keys)
+
+        # Reject proposals that collide with another proposal in the same round
+        proposed = np.concatenate([new1[ok], new2[ok]])
+        uniq, counts = np.unique(proposed, return_counts=True)
+        dupes = uniq[counts > 1]
+        if len(dupes):
+            ok &= ~np.isin(new1, dupes) & ~np.isin(new2, dupes)
+
+        v[e1[ok]], v[e2[ok]] = d[ok], b[ok]
+
+    return u, v, w
+
+def _isin_sorted(values, sorted_keys):
+    pos = np.searchsorted(sorted_keys, values)
+    pos[pos == len(sorted_keys)] = 0
+    return sorted_keys[pos] == values
+
+def _degree_assortativity(indptr, indices):
+    # Pearson correlation of the degrees at either end of every edge (unweighted)
+    degree = np.diff(indptr)
+    src = np.repeat(np.arange(len(degree)), degree)
+    x, y = degree[src].astype(np.float64), degree[indices].astype(np.float64)
+    x, y = x - x.mean(), y - y.mean()
+    denom = np.sqrt((x * x).sum() * (y * y).sum())
+    return float((x * y).sum() / denom) if denom > 0 else float('nan')
+
+def _attribute_assortativity(indptr, indices, labels):
+    # Newman's assortativity coefficient from the normalized mixing matrix
+    k = labels.max() + 1
+    src = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    mixing = np.bincount(labels[src] * k + labels[indices], minlength=k * k).reshape(k, k).astype(np.float64)
+    mixing /= mixing.sum()
+    ab = (mixing.sum(axis=0) * mixing.sum(axis=1)).sum()
+    return float((np.trace(mixing) - ab) / (1 - ab)) if ab < 1 else float('nan')
+
+def _average_clustering(indptr, indices):
+    # Triangles per node: for each edge (u, v), count neighbours w of v that are also neighbours of u
+    n = len(indptr) - 1
+    degree = np.diff(indptr)
+    src = np.repeat(np.arange(n), degree)
+
+    hops = degree[indices]
+    u = np.repeat(src, hops)
+    starts = np.repeat(indptr[indices], hops)
+    offsets = np.arange(hops.sum()) - np.repeat(np.cumsum(hops) - hops, hops)
+    w = indices[starts + offsets]
+
+    # CSR rows are sorted, so the (row, column) keys are globally sorted
+    closed = _isin_sorted(u * n + w, src * n + indices)
+    triangles = np.bincount(u[closed], minlength=n) / 2
+
+    possible = degree * (degree - 1) / 2
+    clustering = np.divide(triangles, possible, out=np.zeros(n), where=possible > 0)
+    return float(clustering.mean()) if n else float('nan')
+
+def _louvain_modularity(n, u, v, w, res, random_state):
+    # python-louvain needs a NetworkX graph, so one is built from the arrays just for this step
+    H = nx.Graph()
+    H.add_nodes_from(range(n))
+    H.add_weighted_edges_from(zip(u.tolist(), v.tolist(), w.tolist()))
+    partition = community_louvain.best_partition(H, weight='weight', random_state=random_state, resolution=res)
+
+    # Modularity computed on the arrays
+    labels = np.fromiter((partition[i] for i in range(n)), dtype=np.int64, count=n)
+    strength = np.bincount(u, weights=w, minlength=n) + np.bincount(v, weights=w, minlength=n)
+    total = w.sum()
+    if total == 0:
+        return float('nan')
+    internal = np.bincount(labels[u], weights=w * (labels[u] == labels[v]), minlength=labels.max() + 1)
+    community_strength = np.bincount(labels, weights=strength)
+    return float((internal / total).sum() - ((community_strength / (2 * total)) ** 2).sum())
+
+def _null_metrics(n, indptr, indices, weights, labels, res, rng):
+    u, v, w = _csr_to_edges(indptr, indices, weights)
+    metrics = {
+        'Degree Assortativity': _degree_assortativity(indptr, indices),
+        'Average Clustering': _average_clustering(indptr, indices),
+        'Louvain Modularity': _louvain_modularity(n, u, v, w, res, int(rng.integers(0, 1e6))),
+    }
+    if labels is not None:
+        metrics['Gender Assortativity'] = _attribute_assortativity(indptr, indices, labels)
+    return metrics
+
+# Arrays shared with worker processes (set once per worker by the pool initializer)
+_null_state = {}
+
+def _init_null_worker(n, u, v, w, labels, rounds, res):
+    _null_state.update(n=n, u=u, v=v, w=w, labels=labels, rounds=rounds, res=res)
+
+def _null_worker(seeds):
+    s = _null_state
+    results = []
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        u, v, w = _double_edge_swap(s['n'], s['u'], s['v'], s['w'], s['rounds'], rng)
+        indptr, indices, weights = _edges_to_csr(s['n'], u, v, w)
+        results.append(_null_metrics(s['n'], indptr, indices, weights, s['labels'], s['res'], rng))
+    return results
+
+@profiling.profiled()
+def null_model_ensemble(
+    G,
+    n_samples=1000,
+    gender=None,
+    swaps_per_edge=10,
+    res=1.5,
+    seed=None,
+    max_workers=None,
+    chunk_size=10
+):
+    """
+    Compares the graph against an ensemble of degree-preserving randomisations.
+
+    Each null graph is made with double-edge swaps on CSR/edge arrays (no NetworkX
+    copies) in parallel worker processes. For the observed graph and every null graph
+    we compute degree assortativity, gender assortativity, average clustering and the
+    modularity of a Louvain partition.
+
+    Args:
+        G: NetworkX Graph, e.g. from create_co_mention_graph
+        n_samples: Number of null graphs to generate
+        gender: Mapping of node -> gender label (e.g. from genderization). If None, the
+            'gender' node attribute is used, and gender assortativity is skipped if missing
+        swaps_per_edge: Number of swap rounds is 2 * swaps_per_edge, i.e. roughly this many
+            proposed swaps per edge
+        res: Louvain resolution, same meaning as in louvain_based_communities_randomized
+        seed: Seed for reproducible ensembles
+        max_workers: Number of worker processes (defaults to the number of CPUs)
+        chunk_size: Number of null graphs per task sent to a worker
+
+    Returns:
+        summary_df: DataFrame with observed value, null mean, null std and z-score per metric
+        null_df: DataFrame with one row of metrics per null graph
+    """
+
+    nodes, indptr, indices, weights = graph_to_csr(G)
+    n = len(nodes)
+    u, v, w = _csr_to_edges(indptr, indices, weights)
+
+    # Encode gender labels as ints
+    if gender is None:
+        gender = nx.get_node_attributes(G, 'gender')
+    labels = None
+    if gender:
+        codes = {}
+        labels = np.array([codes.setdefault(gender.get(node, 'unknown'), len(codes)) for node in nodes], dtype=np.int64)
+
+    seed_seq = np.random.SeedSequence(seed)
+    observed_rng = np.random.default_rng(seed_seq.spawn(1)[0])
+    observed = _null_metrics(n, indptr, indices, weights, labels, res, observed_rng)
+
+    # Independent child seeds per null graph, grouped into tasks
+    child_seeds = seed_seq.spawn(n_samples)
+    tasks = [child_seeds[i:i + chunk_size] for i in range(0, n_samples, chunk_size)]
+
+    null_rows = []
+    with ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        initializer=_init_null_worker,
+        initargs=(n, u, v, w, labels, 2 * swaps_per_edge, res)
+    ) as executor:
+        for results in executor.map(_null_worker, tasks):
+            null_rows.extend(results)
+            profiling.count("null_graphs", len(results))
+            profiling.progress("null_graphs", len(null_rows), n_samples)
+
+    null_df = pd.DataFrame(null_rows)
+
+    # z-scores of the observed values against the null distribution
+    summary_rows = []
+    for metric, value in observed.items():
+        mean, std = null_df[metric].mean(), null_df[metric].std()
+        summary_rows.append({
+            'Metric': metric,
+            'Observed': value,
+            'Null Mean': mean,
+            'Null Std': std,
+            'Z-Score': (value - mean) / std if std > 0 else float('nan')
+        })
+
+    return pd.DataFrame(summary_rows), null_df
+
+
+
+
+########## Persistence ##########
+
+def communities_to_labels(communities, nodes):
+    """
+    Converts communities into an int label array aligned with a node table.
+
+    Args:
+        communities: Output of louvain_based_communities_randomized (list of dicts with 'members'),
+            a list of sets, or a dict of node -> community id as from community_louvain.best_partition
+        nodes: List of node names, position i is node id i
+
+    Returns:
+        int64 array where entry i is the community of node i, -1 if unassigned
+    """
+
+    if isinstance(communities, dict):
+        partition = communities
+    else:
+        partition = {}
+        for comm_id, comm in enumerate(communities):
+            members = comm['members'] if isinstance(comm, dict) else comm
+            for node in members:
+                partition[node] = comm_id
+
+    return np.array([partition.get(node, -1) for node in nodes], dtype=np.int64)
+
+def labels_to_communities(labels, nodes):
+    """Converts an int label array back into a list of node sets (unassigned nodes are dropped)."""
+
+    communities = {}
+    for node, label in zip(nodes, np.asarray(labels).tolist()):
+        if label >= 0:
+            communities.setdefault(label, set()).add(node)
+    return [communities[label] for label in sorted(communities)]
+
+def save_graph(path, G, partitions=None, weight='weight'):
+    """
+    Saves a graph (and optionally partitions) as CSR arrays in a single uncompressed .npz file.
+
+    The node names are stored as one UTF-8 byte array plus offsets, so every array in the
+    file can be memory-mapped by load_graph.
+
+    Args:
+        path: Output file, e.g. 'dataset/co_mention_graph.npz'
+        G: NetworkX Graph, e.g. from create_co_mention_graph
+        partitions: Optional dict of name -> communities (any format accepted by communities_to_labels)
+        weight: Edge attribute used as weight
+    """
+
+    nodes, indptr, indices, weights = graph_to_csr(G, weight=weight)
+
+    encoded = [str(node).encode('utf-8') for node in nodes]
+    node_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=node_offsets[1:])
+    node_bytes = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    arrays = {
+        'indptr': indptr,
+        'indices': indices,
+        'weights': weights,
+        'node_offsets': node_offsets,
+        'node_bytes': node_bytes,
+    }
+    for name, communities in (partitions or {}).items():
+        arrays[f'partition_{name}'] = communities_to_labels(communities, nodes)
+
+    # np.savez stores members uncompressed, which is what makes memory-mapping possible
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+def _npz_memmap(path):
+    # Memory-map every member of an uncompressed .npz by locating its raw data inside the zip
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as f:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"Cannot memory-map compressed member {info.filename} in {path}")
+
+            # Skip the zip local file header (30 bytes + file name + extra field)
+            f.seek(info.header_offset)
+            name_len, extra_len = struct.unpack('<HH', f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+
+            # Parse the .npy header to find dtype, shape and where the data starts
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            name = info.filename[:-len('.npy')]
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype) # empty arrays cannot be mapped
+            else:
+                arrays[name] = np.memmap(
+                    path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                    order='F' if fortran_order else 'C'
+                )
+    return arrays
+
+def load_graph(path, mmap=True):
+    """
+    Loads a graph saved with save_graph.
+
+    With mmap=True the arrays are read-only memory maps of the file, so loading is near-instant
+    and worker processes opening the same file share its pages through the OS page cache.
+
+    Args:
+        path: File written by save_graph
+        mmap: Memory-map the arrays instead of reading them into memory
+
+    Returns:
+        Dict with
+        - 'nodes': list of node names, position i is node id i
+        - 'indptr', 'indices', 'weights': CSR arrays (see graph_to_csr)
+        - 'partitions': dict of name -> int label array (-1 means unassigned)
+    """
+
+    if mmap:
+        arrays = _npz_memmap(path)
+    else:
+        with np.load(path) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+
+    node_bytes = bytes(arrays['node_bytes'])
+    offsets = arrays['node_offsets'].tolist()
+    nodes = [node_bytes[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    return {
+        'nodes': nodes,
+        'indptr': arrays['indptr'],
+        'indices': arrays['indices'],
+        'weights': arrays['weights'],
+        'partitions': {
+            name[len('partition_'):]: labels
+            for name, labels in arrays.items() if name.startswith('partition_')
+        },
+    }
+
+def csr_to_graph(nodes, indptr, indices, weights, weight='weight'):
+    """Converts CSR arrays (e.g. from load_graph) back into a NetworkX Graph."""
+
+    G = nx.Graph()
+    G.add_nodes_from(nodes)
+    u, v, w = _csr_to_edges(np.asarray(indptr), np.asarray(indices), np.asarray(weights))
+    G.add_edges_from(
+        (nodes[a], nodes[b], {weight: c})
+        for a, b, c in zip(u.tolist(), v.tolist(), w.tolist())
+    )
+    return G
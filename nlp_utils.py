@@ -3,6 +3,7 @@ import re
 from collections import defaultdict
 import collections
 from rapidfuzz import fuzz
+import profiling
 
 # Function to find person descriptions
 def find_descriptions(doc):
@@ -67,6 +68,7 @@ def merge_aliases_in_article(names, threshold):
     names = sorted([n for n in names if is_valid_name(n)], key=len, reverse=True)
     alias_map = {}
     used = set()
+    pairs_scored = 0
 
     for i, name in enumerate(names):
         if name in used:
@@ -75,14 +77,17 @@ def merge_aliases_in_article(names, threshold):
         for other in names[i + 1:]:
             if other in used:
                 continue
+            pairs_scored += 1
             if fuzz.WRatio(name, other) >= threshold:
                 group.append(other)
                 used.add(other)
         alias_map[name] = group
         used.add(name)
 
+    profiling.count("pairs_scored", pairs_scored)
     return alias_map
 
+@profiling.profiled()
 def process_person_entities(df, name_col='persons', desc_col='person_descriptions', coref_col='coref_clusters', article_id_col='article_id', threshold=85):
     """
     Process a DataFrame to merge aliases, descriptions, and coreference clusters for person entities.
@@ -108,8 +113,10 @@ def process_person_entities(df, name_col='persons', desc_col='person_description
     })
 
     # Iterate over each row in the DataFrame
-    for idx, row in df.iterrows():
+    for idx, (_, row) in enumerate(df.iterrows()):
         article_id = row[article_id_col]
+        profiling.count("articles")
+        profiling.progress("process_person_entities", idx + 1, len(df))
         people = row.get(name_col, [])
         descs = row.get(desc_col, {})
         coref_clusters = row.get(coref_col, {})
@@ -161,6 +168,7 @@ def process_person_entities(df, name_col='persons', desc_col='person_description
 
 
 # Genderization based on coreference mentions
+@profiling.profiled()
 def genderization(result_df):
     """
     Infers gender for each person in the result DataFrame based on pronoun usage in coreference mentions.
@@ -213,6 +221,8 @@ def genderization(result_df):
                 return first_name_gender[fn]
         return 'unknown'
 
+    profiling.count("persons", len(result_df))
+
     # Apply gender assignment
     result_df['gender'] = result_df.apply(
         lambda row: assign_gender_by_first_name(row['canonical_name'], row['aliases']),
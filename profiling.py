@@ -0,0 +1,331 @@
+# Basics
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+# Lightweight stage-level instrumentation.
+#
+# Usage:
+#   profiling.enable("profile.jsonl")           # or set PIPELINE_PROFILE=profile.jsonl
+#   with profiling.stage("chunk", chunk=1):
+#       for doc in profiling.timed(docs, "transformer"):
+#           with profiling.timer("find_descriptions"):
+#               ...
+#           profiling.count("docs")
+#
+# Every finished stage is written as one JSON line with wall time, peak RSS, counters,
+# per-second rates of the counters and accumulated sub-timers. When profiling is disabled
+# every call returns straight away, so the hooks can stay in the pipeline code.
+
+# Global state
+_enabled = False
+_lock = threading.Lock()
+_stack = []           # active stages, innermost last (opened from the main thread)
+_output = None
+_sampler = None
+_progress_interval = 5.0
+_last_progress = {}
+
+
+
+########## Memory ##########
+
+_page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def current_rss():
+    r"""Current resident set size of this process in bytes.
+
+    Reads /proc/self/statm where available (Linux), otherwise falls back to the peak RSS
+    reported by getrusage.
+
+    :return: RSS in bytes
+    """
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _page_size
+    except (OSError, IndexError, ValueError):
+        import resource # not available on Windows
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if os.uname().sysname == "Darwin" else maxrss * 1024 # bytes on macOS, KB on Linux
+
+def _sample_rss(stop_event, interval):
+    # Background thread updating the peak RSS of every active stage
+    while not stop_event.wait(interval):
+        rss = current_rss()
+        with _lock:
+            for record in _stack:
+                record["peak_rss"] = max(record["peak_rss"], rss)
+
+
+
+########## Setup ##########
+
+def enable(path="profile.jsonl", sample_interval=0.1, progress_interval=5.0):
+    r"""Turns profiling on and appends metrics to a JSONL file.
+
+    :param path: Output JSONL file.
+    :param sample_interval: Seconds between RSS samples.
+    :param progress_interval: Minimum seconds between progress lines of the same task.
+    """
+
+    global _enabled, _output, _sampler, _progress_interval
+
+    disable()
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    _output = open(path, "a", buffering=1)
+    _progress_interval = progress_interval
+
+    stop_event = threading.Event()
+    thread = threading.Thread(target=_sample_rss, args=(stop_event, sample_interval), daemon=True)
+    thread.start()
+    _sampler = (thread, stop_event)
+
+    _enabled = True
+
+def disable():
+    r"""Turns profiling off and closes the output file."""
+
+    global _enabled, _output, _sampler
+
+    _enabled = False
+
+    if _sampler is not None:
+        thread, stop_event = _sampler
+        stop_event.set()
+        thread.join()
+        _sampler = None
+
+    if _output is not None:
+        _output.close()
+        _output = None
+
+    _stack.clear()
+    _last_progress.clear()
+
+def is_enabled():
+    return _enabled
+
+def _write(record):
+    with _lock:
+        if _output is not None:
+            _output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+
+########## Stages ##########
+
+class _NullContext:
+    # Shared no-op context manager handed out while profiling is disabled
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL = _NullContext()
+
+class _Stage:
+    def __init__(self, name, extra):
+        self.name = name
+        self.extra = extra
+
+    def __enter__(self):
+        rss = current_rss()
+        self.record = {
+            "name": self.name,
+            "path": "/".join([r["name"] for r in _stack] + [self.name]),
+            "start": time.time(),
+            "counters": {},
+            "timers": {},
+            "peak_rss": rss,
+        }
+        self.start = time.perf_counter()
+        with _lock:
+            _stack.append(self.record)
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb):
+        wall_time = time.perf_counter() - self.start
+        rss = current_rss()
+
+        with _lock:
+            if self.record in _stack:
+                _stack.remove(self.record)
+        record = self.record
+
+        _write({
+            "event": "stage",
+            "stage": record["name"],
+            "path": record["path"],
+            "start": record["start"],
+            "wall_time_s": round(wall_time, 6),
+            "peak_rss_mb": round(max(record["peak_rss"], rss) / 1024**2, 2),
+            "counters": record["counters"],
+            "rates": {
+                f"{key}_per_s": round(value / wall_time, 2)
+                for key, value in record["counters"].items() if wall_time > 0
+            },
+            "timers": {key: round(value, 6) for key, value in record["timers"].items()},
+            "error": exc_type.__name__ if exc_type else None,
+            **self.extra,
+        })
+        return False
+
+def stage(name, **extra):
+    r"""Context manager timing a pipeline stage.
+
+    :param name: Stage name, nested stages are reported with their full path (e.g. 'nlp/chunk').
+    :param extra: Additional fields written with the stage (e.g. chunk=3).
+    :return: Context manager
+    """
+
+    if not _enabled:
+        return _NULL
+    return _Stage(name, extra)
+
+def profiled(name=None):
+    r"""Decorator running a function as a stage (named after the function by default).
+
+    :param name: Stage name.
+    :return: Decorator
+    """
+
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Stage(stage_name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+
+########## Counters and timers ##########
+
+def count(name, n=1):
+    r"""Adds n to a counter of the innermost active stage (safe to call from any thread).
+
+    :param name: Counter name, e.g. 'docs' or 'pairs_scored'.
+    :param n: Increment.
+    """
+
+    if not _enabled:
+        return
+    with _lock:
+        if _stack:
+            counters = _stack[-1]["counters"]
+            counters[name] = counters.get(name, 0) + n
+
+def _add_time(name, seconds):
+    with _lock:
+        if _stack:
+            timers = _stack[-1]["timers"]
+            timers[name] = timers.get(name, 0.0) + seconds
+
+class _Timer:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        _add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+def timer(name):
+    r"""Context manager adding its wall time to an accumulated timer of the innermost stage.
+
+    Meant for steps that run many times inside one stage (e.g. once per document),
+    where a stage per call would be too fine-grained.
+
+    :param name: Timer name.
+    :return: Context manager
+    """
+
+    if not _enabled:
+        return _NULL
+    return _Timer(name)
+
+def timed(iterable, name):
+    r"""Wraps an iterable and accumulates the time spent producing its items.
+
+    Useful for lazy generators such as nlp.pipe, where the work happens inside next().
+
+    :param iterable: Iterable to wrap.
+    :param name: Timer name.
+    :return: Iterable yielding the same items
+    """
+
+    if not _enabled:
+        return iterable
+    return _timed(iterable, name)
+
+def _timed(iterable, name):
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            _add_time(name, time.perf_counter() - start)
+            return
+        _add_time(name, time.perf_counter() - start)
+        yield item
+
+
+
+########## Progress ##########
+
+def progress(name, done, total=None):
+    r"""Writes a progress line for a long-running loop, at most once per progress interval.
+
+    :param name: Task name, e.g. 'louvain_runs'.
+    :param done: Number of items done so far.
+    :param total: Total number of items, if known.
+    """
+
+    if not _enabled:
+        return
+
+    now = time.perf_counter()
+    with _lock:
+        first_time, first_done, last = _last_progress.setdefault(name, (now, done, float("-inf")))
+        if done != total and now - last < _progress_interval:
+            return
+        _last_progress[name] = (first_time, first_done, now)
+
+    elapsed = now - first_time
+    _write({
+        "event": "progress",
+        "task": name,
+        "time": time.time(),
+        "done": done,
+        "total": total,
+        "fraction": round(done / total, 4) if total else None,
+        "rate_per_s": round((done - first_done) / elapsed, 2) if elapsed > 0 else None,
+        "rss_mb": round(current_rss() / 1024**2, 2),
+    })
+
+    if done == total:
+        with _lock:
+            _last_progress.pop(name, None)
+
+
+
+# Allow profiling whole scripts without code changes, e.g. PIPELINE_PROFILE=profile.jsonl python nlp.py
+if os.environ.get("PIPELINE_PROFILE"):
+    enable(os.environ["PIPELINE_PROFILE"])